@@ -19,6 +19,9 @@ License: MIT
 
 import pygame
 import csv
+import io
+import numpy as np
+import pandas as pd
 import os
 import time
 import sys
@@ -32,6 +35,11 @@ class VertexPursuitReplay:
         """Initialize replay system components."""
         pygame.init()
         
+        # Only queue the event types handled by the main loops
+        self.EVENT_TYPES = [QUIT, KEYDOWN]
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(self.EVENT_TYPES)
+        
         # Display constants
         self.SCREEN_WIDTH = 1000
         self.SCREEN_HEIGHT = 1000
@@ -41,112 +49,205 @@ class VertexPursuitReplay:
         self.BLUE = (0, 0, 255)
         self.GREEN = (0, 255, 0)
         
-        # Initialize display
-        self.screen = pygame.display.set_mode((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
+        # Initialize display with vsync, falling back to an unsynchronized window
+        try:
+            self.screen = pygame.display.set_mode(
+                (self.SCREEN_WIDTH, self.SCREEN_HEIGHT), pygame.SCALED, vsync=1
+            )
+        except pygame.error:
+            self.screen = pygame.display.set_mode((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
         pygame.display.set_caption("Vertex Pursuit: Replay Viewer")
         
         # Load background
         self._load_background()
         
+        # Persistent trajectory layer, drawn incrementally and blitted each frame
+        self.trail_surface = pygame.Surface((self.SCREEN_WIDTH, self.SCREEN_HEIGHT), pygame.SRCALPHA)
+        
+        # Pre-rendered spacebar event marker (filled circle, radius 10)
+        self.event_marker = pygame.Surface((21, 21), pygame.SRCALPHA)
+        pygame.draw.circle(self.event_marker, self.RED, (10, 10), 10)
+        self.event_marker = self.event_marker.convert_alpha()
+        
         # Initialize fonts
         self.font_small = pygame.font.Font(None, 24)
         self.font_medium = pygame.font.Font(None, 32)
         
+        # Cached status text surface, re-rendered only when the message changes
+        self._last_status = None
+        self._status_surface = None
+        self.status_rect = pygame.Rect(0, self.SCREEN_HEIGHT - 30, self.SCREEN_WIDTH, 30)
+        self._status_bg = self.background.subsurface(self.status_rect).copy()
+        
         # Replay state
         self.is_paused = True
-        self.spacebar_events = []  # Store all spacebar event positions for persistent display
         
     def _load_background(self):
         """Load and scale the background image."""
         background_path = Path(__file__).parent / "assets" / "background.jpg"
         
         try:
-            self.background = pygame.image.load(str(background_path)).convert()
+            # Convert after scaling so the final surface matches the display format
             self.background = pygame.transform.scale(
-                self.background, (self.SCREEN_WIDTH, self.SCREEN_HEIGHT)
-            )
+                pygame.image.load(str(background_path)), (self.SCREEN_WIDTH, self.SCREEN_HEIGHT)
+            ).convert()
         except pygame.error as e:
             print(f"Warning: Could not load background image from {background_path}")
             print(f"Using white background as fallback")
             # Create white background as fallback
             self.background = pygame.Surface((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
             self.background.fill(self.WHITE)
+        
+        # Background is fully opaque; make sure blits take the plain copy path
+        self.background.set_alpha(None)
     
     def _get_data_file_path(self, participant_number, trial_number):
-        """Construct file path for trajectory data."""
+        """Construct file path for trajectory data, preferring binary .npy over CSV."""
         data_dir = Path(__file__).parent / "data" / "raw" / "trajectories"
-        filename = f"SHSA_{participant_number}_{trial_number}.csv"
-        return data_dir / filename
+        filepath = data_dir / f"SHSA_{participant_number}_{trial_number}.npy"
+        if filepath.exists():
+            return filepath
+        return filepath.with_suffix('.csv')
     
     def _display_status_message(self, message, color=None):
         """Display status message in bottom-left corner."""
         if color is None:
             color = self.BLACK
             
-        text_surface = self.font_small.render(message, True, color)
+        if (message, color) != self._last_status:
+            self._status_surface = self.font_small.render(message, True, color)
+            self._last_status = (message, color)
         # Position in bottom-left corner with padding
-        self.screen.blit(text_surface, (10, self.SCREEN_HEIGHT - 30))
+        self.screen.blit(self._status_surface, (10, self.SCREEN_HEIGHT - 30))
     
     def _load_trial_data(self, filepath):
-        """Load and validate trial data from CSV file."""
+        """Load and validate trial data from a .npy or CSV file.
+        
+        Returns four contiguous arrays (timestamps, x, y, events). Binary files
+        are memory-mapped; CSV files are parsed in a single vectorized pass.
+        """
         try:
-            with open(filepath, 'r', encoding='utf-8') as csvfile:
-                reader = csv.reader(csvfile)
-                header = next(reader)  # Skip header
-                
-                # Validate header format
-                expected_header = ['Timestamp', 'X', 'Y', 'Event']
-                if header != expected_header:
-                    print(f"Warning: Unexpected header format: {header}")
-                
-                # Load and validate data
-                events_data = []
-                for row_num, row in enumerate(reader, start=2):
-                    try:
-                        timestamp = float(row[0])
-                        x = int(row[1])
-                        y = int(row[2])
-                        event = int(row[3])
-                        events_data.append((timestamp, x, y, event))
-                    except (ValueError, IndexError) as e:
-                        print(f"Warning: Invalid data in row {row_num}: {row}")
-                        continue
-                
-                if not events_data:
-                    raise ValueError("No valid data found in file")
-                    
-                return events_data
+            if filepath.suffix == '.npy':
+                data = np.load(filepath, mmap_mode='r')
+            else:
+                data = self._load_trial_csv(filepath)
+            
+            if data.size == 0:
+                raise ValueError("No valid data found in file")
+            
+            return (
+                np.ascontiguousarray(data['t']),
+                np.ascontiguousarray(data['x']),
+                np.ascontiguousarray(data['y']),
+                np.ascontiguousarray(data['e']),
+            )
                 
         except FileNotFoundError:
             raise FileNotFoundError(f"Trial data file not found: {filepath}")
         except Exception as e:
             raise Exception(f"Error loading trial data: {e}")
     
-    def _draw_trajectory_segment(self, start_pos, end_pos):
-        """Draw a single trajectory segment."""
-        if start_pos != (-1, -1):
-            pygame.draw.line(self.screen, self.RED, start_pos, end_pos, width=5)
+    def _load_trial_csv(self, filepath):
+        """Parse a trial CSV file into a structured array, skipping invalid rows."""
+        with open(filepath, 'r', encoding='utf-8') as csvfile:
+            header = csvfile.readline().strip().split(',')
+            
+            # Validate header format
+            expected_header = ['Timestamp', 'X', 'Y', 'Event']
+            if header != expected_header:
+                print(f"Warning: Unexpected header format: {header}")
+            
+            # Keep the raw lines so invalid rows can be reported as written
+            lines = csvfile.read().splitlines()
+        
+        # Parse all rows in one pass; blank lines are kept so the frame
+        # index maps directly to the file row number
+        parsed = pd.read_csv(
+            io.StringIO('\n'.join(lines)),
+            header=None,
+            names=['t', 'x', 'y', 'e'],
+            usecols=[0, 1, 2, 3],
+            engine='c',
+            float_precision='round_trip',
+            skip_blank_lines=False,
+        )
+        
+        # Rows with missing, non-numeric, non-integer or out-of-range fields are invalid
+        dtype = np.dtype([('t', 'f8'), ('x', 'i4'), ('y', 'i4'), ('e', 'i1')])
+        values = parsed.apply(pd.to_numeric, errors='coerce').astype('f8')
+        invalid = values.isna().any(axis=1)
+        for column in ['x', 'y', 'e']:
+            limits = np.iinfo(dtype[column])
+            col = values[column]
+            invalid |= (col != col.round()) | (col < limits.min) | (col > limits.max)
+        
+        for row_index in np.flatnonzero(invalid.to_numpy()):
+            row = next(csv.reader([lines[row_index]]), [])
+            print(f"Warning: Invalid data in row {row_index + 2}: {row}")
+        
+        valid = values[~invalid]
+        data = np.empty(len(valid), dtype=dtype)
+        for column in dtype.names:
+            data[column] = valid[column].to_numpy()
+        return data
     
-    def _draw_spacebar_events(self):
-        """Draw all recorded spacebar event positions as persistent circles."""
-        for pos in self.spacebar_events:
-            # Draw filled circle for spacebar events
-            pygame.draw.circle(self.screen, self.RED, pos, 10)
-            # Draw outline for better visibility
-            # pygame.draw.circle(self.screen, self.BLACK, pos, 10, 2)
+    def _draw_trajectory_segments(self, start, end):
+        """Draw the trajectory segments leading up to data points [start, end).
+        
+        Returns the bounding rectangle of the drawn pixels, or None if nothing was drawn.
+        """
+        # Include the previous point so the new segments connect to the trail
+        first = max(start - 1, 0)
+        if end - first > 1:
+            points = np.column_stack((self.xs[first:end], self.ys[first:end]))
+            # Skip consecutive duplicates so idle stretches rasterize no zero-length segments
+            keep = np.ones(len(points), dtype=bool)
+            keep[1:] = np.any(points[1:] != points[:-1], axis=1)
+            if np.count_nonzero(keep) > 1:
+                return pygame.draw.lines(self.trail_surface, self.RED, False, points[keep].tolist(), width=5)
+        return None
+    
+    def _advance_counter(self, counter, elapsed):
+        """Return the number of data points whose playback time is at or before elapsed.
+        
+        Playback usually moves forward only one or two points per frame, so those are
+        stepped through directly before falling back to a binary search of the rest.
+        """
+        playback_times = self.playback_times
+        n_points = len(playback_times)
+        for _ in range(4):
+            if counter >= n_points or playback_times[counter] > elapsed:
+                return counter
+            counter += 1
+        return counter + int(np.searchsorted(playback_times[counter:], elapsed, side='right'))
     
     def _replay_trial(self, filepath):
         """Replay a single trial with trajectory and event visualization."""
         try:
             # Load trial data
-            events_data = self._load_trial_data(filepath)
-            print(f"✓ Loaded {len(events_data)} data points from {filepath.name}")
+            self.timestamps, self.xs, self.ys, self.events = self._load_trial_data(filepath)
+            timestamps, xs, ys, events = self.timestamps, self.xs, self.ys, self.events
+            n_points = len(timestamps)
+            print(f"✓ Loaded {n_points} data points from {filepath.name}")
+            
+            # Precompute inter-sample delays, capped to prevent long pauses,
+            # and the resulting playback time of each data point
+            self.delays = np.clip(np.diff(timestamps, prepend=timestamps[0]), 0.0, 0.1)
+            self.playback_times = np.cumsum(self.delays)
+            
+            # Locate all spacebar events once instead of testing each data point
+            self.event_idx = np.flatnonzero(events)
+            self.event_xy = np.stack([xs[self.event_idx], ys[self.event_idx]], axis=1)
+            event_idx = self.event_idx
             
             # Initialize replay state
             counter = 0
-            previous_position = (-1, -1)
-            previous_timestamp = 0
-            self.spacebar_events = []  # Reset spacebar events for new trial
+            n_events = 0
+            frame = 0
+            status_text = None  # Rebuilt every few frames or when pause state changes
+            elapsed = 0.0  # Playback time reached so far, preserved across pauses
+            start_time = time.perf_counter()
+            self.trail_surface.fill((0, 0, 0, 0))  # Clear trajectory from previous trial
             clock = pygame.time.Clock()
             
             # Clear screen and show initial message
@@ -155,16 +256,20 @@ class VertexPursuitReplay:
             pygame.display.flip()
             
             # Main replay loop
-            while counter < len(events_data):
+            while counter < n_points:
                 # Handle events
-                for event in pygame.event.get():
+                for event in pygame.event.get(self.EVENT_TYPES):
                     if event.type == QUIT:
                         return -1
                     elif event.type == KEYDOWN:
                         if event.key == K_p:
                             self.is_paused = not self.is_paused
+                            if not self.is_paused:
+                                # Resume from where playback was paused
+                                start_time = time.perf_counter() - elapsed
                             status = "Paused" if self.is_paused else "Playing"
                             print(f"Replay {status}")
+                            status_text = None
                         elif event.key == K_q:
                             print("Replay stopped by user")
                             return -1
@@ -172,40 +277,54 @@ class VertexPursuitReplay:
                             print("Restarting replay...")
                             return 1
                 
-                # Process current data point if not paused
+                # Screen areas that changed this frame (besides the status bar)
+                dirty_rects = []
+                
+                # Process all data points due by now if not paused
                 if not self.is_paused:
-                    timestamp, x, y, spacebar_event = events_data[counter]
-                    current_position = (x, y)
+                    elapsed = time.perf_counter() - start_time
+                    new_counter = self._advance_counter(counter, elapsed)
                     
-                    # Draw trajectory segment
-                    self._draw_trajectory_segment(previous_position, current_position)
-                    
-                    # Record spacebar events for persistent display
-                    if spacebar_event == 1:
-                        self.spacebar_events.append(current_position)
-                    
-                    # Draw all spacebar events (persistent)
-                    self._draw_spacebar_events()
-                    
-                    # Calculate and apply timing delay
-                    if counter > 0:
-                        delay = timestamp - previous_timestamp
-                        if delay > 0:
-                            time.sleep(min(delay, 0.1))  # Cap delay to prevent long pauses
-                    
-                    previous_position = current_position
-                    previous_timestamp = timestamp
-                    counter += 1
+                    if new_counter > counter:
+                        # Draw trajectory segments
+                        segment_rect = self._draw_trajectory_segments(counter, new_counter)
+                        if segment_rect is not None:
+                            dirty_rects.append(segment_rect)
+                        
+                        # Stamp newly reached spacebar events onto the trail
+                        n_events_now = int(np.searchsorted(event_idx, new_counter))
+                        if n_events_now > n_events:
+                            dirty_rects.extend(self.trail_surface.blits(
+                                [(self.event_marker, (x - 10, y - 10))
+                                 for x, y in self.event_xy[n_events:n_events_now]]
+                            ))
+                            n_events = n_events_now
+                        
+                        counter = new_counter
+                
+                # Redraw changed areas from background and persistent trajectory layer
+                for rect in dirty_rects:
+                    self.screen.blit(self.background, rect, rect)
+                    self.screen.blit(self.trail_surface, rect, rect)
                 
-                # Update display and status
-                progress = f"Progress: {counter}/{len(events_data)} ({counter/len(events_data)*100:.1f}%)"
-                status = "PAUSED - Press P to resume" if self.is_paused else "PLAYING - Press P to pause"
+                # Clear the status bar from its pre-cropped background strip
+                self.screen.blit(self._status_bg, self.status_rect)
+                self.screen.blit(self.trail_surface, self.status_rect, self.status_rect)
                 
-                self._display_status_message(f"{status} | {progress} | Q: Quit | R: Restart")
-                pygame.display.flip()
-                clock.tick(60)  # Maintain smooth frame rate
+                # Update display and status; progress text refreshes at ~10 Hz
+                if status_text is None or frame % 6 == 0:
+                    progress = f"Progress: {counter}/{n_points} ({counter/n_points*100:.1f}%)"
+                    status = "PAUSED - Press P to resume" if self.is_paused else "PLAYING - Press P to pause"
+                    status_text = f"{status} | {progress} | Q: Quit | R: Restart"
+                
+                self._display_status_message(status_text)
+                pygame.display.update([self.status_rect, *dirty_rects])
+                frame += 1
+                clock.tick(120)  # Safety cap; vsync paces the display updates
             
             # Replay completed
+            self.screen.blit(self.background, (0, 0))
+            self.screen.blit(self.trail_surface, (0, 0))
             self._display_status_message("Replay completed - Press R for new trial")
             pygame.display.flip()
             print("✓ Replay completed successfully")
@@ -262,7 +381,7 @@ class VertexPursuitReplay:
         pygame.display.flip()
         
         while running:
-            for event in pygame.event.get():
+            for event in pygame.event.get(self.EVENT_TYPES):
                 if event.type == QUIT:
                     running = False
                 elif event.type == KEYDOWN:
@@ -14,8 +14,10 @@ License: MIT
 """
 
 import pygame
-import csv
+import argparse
+import numpy as np
 import os
+import re
 import time
 import sys
 from pathlib import Path
@@ -24,10 +26,19 @@ from pygame.locals import *
 class VertexPursuitGame:
     """Main game class for the Vertex Pursuit motor skill assessment."""
     
-    def __init__(self):
-        """Initialize game components and settings."""
+    def __init__(self, export_csv=False):
+        """Initialize game components and settings.
+        
+        Args:
+            export_csv: Also write each saved trial as CSV next to the .npy file.
+        """
         pygame.init()
         
+        # Only queue the event types handled by the main loops
+        self.EVENT_TYPES = [QUIT, KEYDOWN, KEYUP]
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(self.EVENT_TYPES)
+        
         # Game constants
         self.SCREEN_WIDTH = 1000
         self.SCREEN_HEIGHT = 1000
@@ -35,38 +46,57 @@ class VertexPursuitGame:
         self.RED = (255, 0, 0)
         self.WHITE = (255, 255, 255)
         
-        # Initialize display
+        # Trajectory sample layout and initial buffer capacity (10 min at 1000 Hz)
+        self.SAMPLE_DTYPE = np.dtype([('t', 'f8'), ('x', 'i4'), ('y', 'i4'), ('e', 'i1')])
+        self.BUFFER_CAPACITY = 600_000
+        
+        # Mouse polling and display rates (Hz); the mouse is polled several times per frame
+        self.SAMPLE_RATE = 240
+        self.FRAME_RATE = 60
+        
+        # Initialize display unscaled so logical and physical pixels stay 1:1
         self.screen = pygame.display.set_mode((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
         pygame.display.set_caption("Vertex Pursuit: Motor Skill Assessment")
         
         # Load background image
         self._load_background()
         
+        # Persistent trajectory layer, extended only with newly recorded points
+        self.trail_surface = pygame.Surface((self.SCREEN_WIDTH, self.SCREEN_HEIGHT), pygame.SRCALPHA)
+        self.last_drawn_index = 0
+        
         # Game state variables
         self.tracking = False
-        self.mouse_positions = []
+        self.mouse_positions = np.empty(self.BUFFER_CAPACITY, dtype=self.SAMPLE_DTYPE)
+        self.n_positions = 0  # Number of valid samples in mouse_positions
         self.space_event = 0
+        self.space_pressed_since_sample = False  # Latches taps shorter than one poll
         self.start_time = 0
         self.save_prompt = False
         self.next_participant = False
+        self.export_csv = export_csv  # Also write the CSV format used by the published dataset
         
         # Participant and trial management
         self.participant_number = self._get_next_participant_number()
         self.trial_number = 1
         self.max_trials = 5
         
-        # Font for UI elements
+        # Fonts for UI elements
         self.font = pygame.font.Font(None, 36)
+        self.font_status = pygame.font.Font(None, 24)
+        
+        # Rendered status label, keyed by the (participant, trial) it shows
+        self._status_cache = (None, None)
     
     def _load_background(self):
         """Load and scale the background image."""
         background_path = Path(__file__).parent / "assets" / "background.jpg"
         
         try:
-            self.background = pygame.image.load(str(background_path)).convert()
+            # Convert after scaling so the final surface matches the display format
             self.background = pygame.transform.scale(
-                self.background, (self.SCREEN_WIDTH, self.SCREEN_HEIGHT)
-            )
+                pygame.image.load(str(background_path)), (self.SCREEN_WIDTH, self.SCREEN_HEIGHT)
+            ).convert()
         except pygame.error as e:
             print(f"Warning: Could not load background image from {background_path}")
             print(f"Error: {e}")
@@ -79,22 +109,17 @@ class VertexPursuitGame:
         data_dir = Path(__file__).parent / "data" / "raw" / "trajectories"
         data_dir.mkdir(parents=True, exist_ok=True)
         
-        existing_files = list(data_dir.glob("SHSA_*.csv"))
+        # Match trial files: SHSA_X_Y.csv / SHSA_X_Y.npy
+        pattern = re.compile(r'^SHSA_(\d+)_\d+\.(?:csv|npy)$')
         
-        if not existing_files:
-            return 1
+        highest = 0
+        with os.scandir(data_dir) as entries:
+            for entry in entries:
+                match = pattern.match(entry.name)
+                if match:
+                    highest = max(highest, int(match.group(1)))
         
-        existing_numbers = []
-        for file in existing_files:
-            try:
-                # Extract participant number from filename: SHSA_X_Y.csv
-                parts = file.stem.split("_")
-                if len(parts) >= 2:
-                    existing_numbers.append(int(parts[1]))
-            except (ValueError, IndexError):
-                continue
-        
-        return max(existing_numbers, default=0) + 1
+        return highest + 1
     
     def _display_message(self, message, color=None):
         """Display a message on screen."""
@@ -109,8 +134,8 @@ class VertexPursuitGame:
         self.screen.blit(text_surface, text_rect)
     
     def _save_trajectory_data(self):
-        """Save collected mouse trajectory data to CSV file."""
-        if not self.mouse_positions:
+        """Save collected mouse trajectory data to .npy file, optionally exporting CSV."""
+        if self.n_positions == 0:
             print("Warning: No trajectory data to save")
             return False
         
@@ -118,31 +143,48 @@ class VertexPursuitGame:
         data_dir = Path(__file__).parent / "data" / "raw" / "trajectories"
         data_dir.mkdir(parents=True, exist_ok=True)
         
-        filename = f"SHSA_{self.participant_number}_{self.trial_number}.csv"
+        filename = f"SHSA_{self.participant_number}_{self.trial_number}.npy"
         filepath = data_dir / filename
         
         try:
-            with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(['Timestamp', 'X', 'Y', 'Event'])
-                
-                for timestamp, x, y, event in self.mouse_positions:
-                    writer.writerow([timestamp, x, y, event])
-            
+            self._save_trajectory_npy(filepath)
             print(f"✓ Saved trial data: {filename}")
+            
+            if self.export_csv:
+                self._save_trajectory_csv(filepath.with_suffix('.csv'))
+                print(f"✓ Exported trial data: {filepath.with_suffix('.csv').name}")
+            
             return True
             
         except IOError as e:
             print(f"Error saving file {filepath}: {e}")
             return False
     
+    def _save_trajectory_npy(self, filepath):
+        """Write recorded samples as a binary structured array."""
+        np.save(filepath, self.mouse_positions[:self.n_positions])
+    
+    def _save_trajectory_csv(self, filepath):
+        """Write recorded samples in the CSV format used by the published dataset."""
+        samples = self.mouse_positions[:self.n_positions]
+        # Convert columns to Python scalars once and format every row into a single write
+        rows = zip(samples['t'].tolist(), samples['x'].tolist(),
+                   samples['y'].tolist(), samples['e'].tolist())
+        
+        with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
+            csvfile.write('Timestamp,X,Y,Event\n')
+            csvfile.write(''.join(['%.6f,%d,%d,%d\n' % row for row in rows]))
+    
     def _handle_keydown(self, key):
         """Process keyboard input events."""
         if key == K_s and not self.next_participant:
             # Start tracking
             self.tracking = True
-            self.start_time = time.time()
-            self.mouse_positions = []
+            self.start_time = time.perf_counter()
+            self.n_positions = 0
+            self.space_pressed_since_sample = False
+            self.trail_surface.fill((0, 0, 0, 0))
+            self.last_drawn_index = 0
             print(f"Started tracking - Participant {self.participant_number}, Trial {self.trial_number}")
             
         elif key == K_q:
@@ -179,8 +221,9 @@ class VertexPursuitGame:
             print("Continuing with current participant")
             
         elif key == K_SPACE:
-            # Spacebar press event
+            # Spacebar press event; latched until the next stored sample
             self.space_event = 1
+            self.space_pressed_since_sample = True
             
         elif key == K_ESCAPE:
             # Quick exit
@@ -193,24 +236,53 @@ class VertexPursuitGame:
         if key == K_SPACE:
             self.space_event = 0
     
-    def _handle_mouse_motion(self, pos):
-        """Process mouse movement during tracking."""
+    def _sample_mouse_position(self, pos):
+        """Record the current mouse position during tracking, if it has moved."""
         if self.tracking:
             x, y = pos
-            timestamp = time.time() - self.start_time
-            self.mouse_positions.append((timestamp, x, y, self.space_event))
+            buffer, n = self.mouse_positions, self.n_positions
+            
+            # Like the original motion-event recording, store no rows while idle
+            if n > 0 and buffer[n - 1]['x'] == x and buffer[n - 1]['y'] == y:
+                return
+            
+            timestamp = time.perf_counter() - self.start_time
+            
+            # Grow the buffer when a trial outlasts its capacity
+            if n == len(buffer):
+                buffer = self.mouse_positions = np.resize(buffer, 2 * n)
+            
+            event = 1 if self.space_event or self.space_pressed_since_sample else 0
+            buffer[n] = (timestamp, x, y, event)
+            self.n_positions = n + 1
+            self.space_pressed_since_sample = False
     
     def _render_trajectory(self):
         """Draw the current trajectory on screen."""
-        if self.tracking and len(self.mouse_positions) > 1:
-            points = [(pos[1], pos[2]) for pos in self.mouse_positions]
-            pygame.draw.lines(self.screen, self.RED, False, points, width=3)
+        if self.tracking and self.n_positions > 1:
+            # Only draw segments added since the last frame; overlap by one point to stay connected
+            start = max(self.last_drawn_index - 1, 0)
+            if self.n_positions - start > 1:
+                samples = self.mouse_positions[start:self.n_positions]
+                points = np.column_stack((samples['x'], samples['y']))
+                # Skip consecutive duplicates recorded while the mouse is idle
+                keep = np.ones(len(points), dtype=bool)
+                keep[1:] = np.any(points[1:] != points[:-1], axis=1)
+                if np.count_nonzero(keep) > 1:
+                    pygame.draw.lines(self.trail_surface, self.RED, False, points[keep].tolist(), width=3)
+                self.last_drawn_index = self.n_positions
+            
+            self.screen.blit(self.trail_surface, (0, 0))
     
     def _render_ui(self):
         """Render user interface elements."""
-        # Status information
-        status_text = f"Participant: {self.participant_number} | Trial: {self.trial_number}/{self.max_trials}"
-        status_surface = pygame.font.Font(None, 24).render(status_text, True, self.WHITE)
+        # Status information, re-rendered only when participant or trial changes
+        state_key = (self.participant_number, self.trial_number)
+        cached_key, status_surface = self._status_cache
+        if state_key != cached_key:
+            status_text = f"Participant: {self.participant_number} | Trial: {self.trial_number}/{self.max_trials}"
+            status_surface = self.font_status.render(status_text, True, self.WHITE)
+            self._status_cache = (state_key, status_surface)
         self.screen.blit(status_surface, (10, 10))
         
         # Show prompts
@@ -235,9 +307,12 @@ class VertexPursuitGame:
         print("  ESC - Quit")
         print("=" * 45)
         
+        polls_per_frame = self.SAMPLE_RATE // self.FRAME_RATE
+        poll_count = 0
+        
         while running:
             # Handle events
-            for event in pygame.event.get():
+            for event in pygame.event.get(self.EVENT_TYPES):
                 if event.type == QUIT:
                     running = False
                     
@@ -247,17 +322,19 @@ class VertexPursuitGame:
                         
                 elif event.type == KEYUP:
                     self._handle_keyup(event.key)
-                    
-                elif event.type == MOUSEMOTION:
-                    self._handle_mouse_motion(event.pos)
             
-            # Render frame
-            self.screen.blit(self.background, (0, 0))
-            self._render_trajectory()
-            self._render_ui()
+            # Poll the mouse at SAMPLE_RATE instead of handling each motion event
+            self._sample_mouse_position(pygame.mouse.get_pos())
             
-            pygame.display.flip()
-            clock.tick(60)  # 60 FPS
+            # Render only every few polls to keep the display at FRAME_RATE
+            if poll_count % polls_per_frame == 0:
+                self.screen.blit(self.background, (0, 0))
+                self._render_trajectory()
+                self._render_ui()
+                pygame.display.flip()
+            
+            poll_count += 1
+            clock.tick(self.SAMPLE_RATE)
         
         pygame.quit()
         print("Game session ended.")
@@ -265,8 +342,16 @@ class VertexPursuitGame:
 
 def main():
     """Entry point for the Vertex Pursuit game."""
+    parser = argparse.ArgumentParser(description="Vertex Pursuit: Motor Skill Assessment")
+    parser.add_argument(
+        "--export-csv",
+        action="store_true",
+        help="also save each trial as SHSA_X_Y.csv alongside the .npy recording",
+    )
+    args = parser.parse_args()
+    
     try:
-        game = VertexPursuitGame()
+        game = VertexPursuitGame(export_csv=args.export_csv)
         game.run()
     except KeyboardInterrupt:
         print("\nGame interrupted by user")